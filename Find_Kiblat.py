@@ -1,12 +1,17 @@
 import math
+import os
 import numpy as np
+import matplotlib
+# Headless runs (KIBLAT_HEADLESS set) render with Agg and save to a file instead of opening a window
+HEADLESS = bool(os.environ.get("KIBLAT_HEADLESS"))
+if HEADLESS:
+    matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 import pytz
 from skyfield.api import Loader, Topos
-from skyfield import almanac
-from scipy.optimize import minimize_scalar
-import pytz
+from scipy.optimize import fminbound
 from timezonefinder import TimezoneFinder
 
 # Load astronomical data
@@ -19,66 +24,199 @@ earth = eph["earth"]
 # Kaabah coordinates in radians (fixed)
 kaabah_lat = math.radians(21.4225)
 kaabah_lon = math.radians(39.8262)
+SIN_KAABAH_LAT = math.sin(kaabah_lat)
+COS_KAABAH_LAT = math.cos(kaabah_lat)
 
-def geodetic_to_ecef(lat, lon):
-    return np.array([
-        math.cos(lat) * math.cos(lon),
-        math.cos(lat) * math.sin(lon),
-        math.sin(lat)
-    ])
+# Altitude of the sun's centre at sunrise/sunset (refraction + solar semidiameter, as in Skyfield's almanac)
+SUN_HORIZON_DEG = -0.8333
 
-def is_polar_region(lat):
-    return abs(lat) > 66.5
+# Horizon circle (r = 90) in plot coordinates, 1° steps with the endpoint included so it closes
+_THETA = np.linspace(0, 2 * math.pi, 361)
+HORIZON_X = 90 * np.sin(_THETA)
+HORIZON_Y = 90 * np.cos(_THETA)
 
 def calculate_qibla_bearing(home_lat, home_lon):
     lat1 = math.radians(home_lat)
-    lat2 = math.radians(21.4225)
-    dLon = math.radians(39.8262 - home_lon)
-    x = math.sin(dLon) * math.cos(lat2)
-    y = math.cos(lat1) * math.sin(lat2) - math.sin(lat1)*math.cos(lat2)*math.cos(dLon)
+    dLon = kaabah_lon - math.radians(home_lon)
+    s, c = math.sin(lat1), math.cos(lat1)
+    x = math.sin(dLon) * COS_KAABAH_LAT
+    y = c * SIN_KAABAH_LAT - s * COS_KAABAH_LAT * math.cos(dLon)
     bearing_rad = math.atan2(x, y)
     return (math.degrees(bearing_rad) + 360) % 360
 
-def find_azimuth_error(seconds_since_start, lat, lon, start_dt, target_azimuth):
+def _sun_equatorial(jd):
+    """
+    Low-precision solar coordinates (Meeus, Astronomical Algorithms ch. 25 and 12) for an array of
+    Julian dates jd (UT). These do not depend on the observer, so many locations can share them.
+    Returns (right ascension, declination, Greenwich mean sidereal time) in radians.
+    """
+    T = (jd - 2451545.0) / 36525.0
+    L0 = 280.46646 + 36000.76983 * T + 0.0003032 * T**2
+    M = np.radians(357.52911 + 35999.05029 * T - 0.0001537 * T**2)
+    C = ((1.914602 - 0.004817 * T - 0.000014 * T**2) * np.sin(M)
+         + (0.019993 - 0.000101 * T) * np.sin(2 * M)
+         + 0.000289 * np.sin(3 * M))
+    omega = np.radians(125.04 - 1934.136 * T)
+    lam = np.radians(L0 + C - 0.00569 - 0.00478 * np.sin(omega))  # apparent longitude
+    eps0 = 23.0 + (26.0 + (21.448 - 46.8150 * T - 0.00059 * T**2 + 0.001813 * T**3) / 60.0) / 60.0
+    eps = np.radians(eps0 + 0.00256 * np.cos(omega))  # corrected obliquity
+
+    ra = np.arctan2(np.cos(eps) * np.sin(lam), np.cos(lam))
+    dec = np.arcsin(np.sin(eps) * np.sin(lam))
+    gmst = np.radians(280.46061837 + 360.98564736629 * (jd - 2451545.0)
+                      + 0.000387933 * T**2 - T**3 / 38710000.0)
+    return ra, dec, gmst
+
+def _equatorial_to_altaz(ra, dec, gmst, lat_rad, lon_rad):
+    """
+    Convert solar RA/declination and sidereal time (radians) to (altitude, azimuth) in degrees for
+    an observer at lat_rad/lon_rad. Broadcasts, so lat/lon may be column vectors of many observers.
+    """
+    H = gmst + lon_rad - ra  # local hour angle
+    sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+    alt = np.arcsin(sin_lat * np.sin(dec) + cos_lat * np.cos(dec) * np.cos(H))
+    az = np.arctan2(-np.cos(dec) * np.sin(H), cos_lat * np.sin(dec) - sin_lat * np.cos(dec) * np.cos(H))
+    return np.degrees(alt), np.degrees(az) % 360.0
+
+def sun_altaz_vec(jd, lat_rad, lon_rad):
+    """
+    Low-precision solar position for an array of Julian dates jd (UT), seen from latitude/longitude
+    in radians. Good to ~0.01°, which is plenty for the per-minute grid; Skyfield is only used to
+    refine the alignment time.
+    Returns (altitude, azimuth) in degrees, azimuth measured east from north.
+    """
+    ra, dec, gmst = _sun_equatorial(jd)
+    return _equatorial_to_altaz(ra, dec, gmst, lat_rad, lon_rad)
+
+def _alt_az_batch(seconds_since_start, sun_at, jd0):
+    """
+    Sun's (altitude, azimuth) in degrees at offsets (in seconds, scalar or array) from the UT1
+    Julian date jd0. sun_at is the bound .at method of the sun-from-observer vector (sun - observer);
+    its geometric position is accurate to ~0.02°, far inside the alignment tolerance.
+    """
+    t = ts.ut1_jd(jd0 + np.asarray(seconds_since_start) / 86400.0)
+    alt, az, _ = sun_at(t).altaz()
+    return alt.degrees, az.degrees
+
+def _error_from_az(alt_deg, az_deg, target_azimuth):
+    """
+    Element-wise min(direct error, reverse error) between az_deg and target_azimuth, which folds to
+    the distance from the nearest multiple of 180°. Samples with the sun below the horizon get 999.
+    """
+    d = (az_deg - target_azimuth) % 180.0
+    err = np.minimum(d, 180.0 - d)
+    return np.where(alt_deg > 0, err, 999.0)
+
+def find_azimuth_error(seconds_since_start, sun_at, jd0, target_azimuth):
     """
-    For a time offset (in seconds from start_dt), compute the error between the sun's azimuth
-    and the target bearing (or the reverse, target+180°). Returns 999 if the sun is below horizon.
+    For a time offset (in seconds from the UT1 Julian date jd0), compute the error between the sun's
+    azimuth and the target bearing (or the reverse, target+180°). sun_at is the bound .at method
+    of the sun-from-observer vector, looked up once by the caller.
+    Returns 999 if the sun is below horizon.
     """
-    dt = start_dt + timedelta(seconds=seconds_since_start)
-    t = ts.from_datetime(dt)
-    obs = (earth + Topos(latitude_degrees=lat, longitude_degrees=lon)).at(t).observe(sun).apparent()
-    alt, az, _ = obs.altaz()
-    if alt.degrees <= 0:
-        return 999  # penalize times when the sun is below horizon
-    
-    # Compute direct error and reverse error
-    direct_error = abs((az.degrees - target_azimuth + 180) % 360 - 180)
-    reverse_target = (target_azimuth + 180) % 360
-    reverse_error = abs((az.degrees - reverse_target + 180) % 360 - 180)
-    return min(direct_error, reverse_error)
-
-def find_closest_azimuth_time(lat, lon, timezone_str, date, target_azimuth, tol=5.0):
+    alt_deg, az_deg = _alt_az_batch(seconds_since_start, sun_at, jd0)
+    return _error_from_az(np.atleast_1d(alt_deg), np.atleast_1d(az_deg), target_azimuth)[0]
+
+def find_closest_azimuth_time(sun_from_observer, start_ts, jd0, grid_alt, grid_az, target_azimuth, tol=5.0):
     """
     Find the time during the day when the sun's azimuth (or its reverse) is closest to target_azimuth.
+    The day starts at the POSIX timestamp start_ts, which is the UT1 Julian date jd0. grid_alt/grid_az
+    are the sun's altitude and azimuth (degrees) sampled every minute from there; the best grid cell
+    seeds a bounded search over a ±120 s window around it.
     If the minimum error exceeds tol (in degrees), return None to indicate no valid alignment.
     """
-    timezone = pytz.timezone(timezone_str)
-    start_dt = timezone.localize(datetime.combine(date, datetime.min.time())).astimezone(pytz.utc)
-    end_dt = start_dt + timedelta(days=1)
-    duration = (end_dt - start_dt).total_seconds()
+    err = _error_from_az(grid_alt, grid_az, target_azimuth)  # 999 while the sun is down
 
-    result = minimize_scalar(
+    i = int(np.argmin(err))
+    if err[i] > tol:
+        return None, err[i]  # no alignment within tolerance
+
+    duration = (len(grid_az) - 1) * 60
+    x, fun, _, _ = fminbound(
         find_azimuth_error,
-        bounds=(0, duration), 
-        method='bounded',
-        args=(lat, lon, start_dt, target_azimuth),
-        options={'xatol': 1}
+        max(0, i * 60 - 120),
+        min(duration, i * 60 + 120),
+        args=(sun_from_observer.at, jd0, target_azimuth),
+        xtol=1,
+        maxfun=20,
+        full_output=True
     )
-    
-    if result.fun > tol:
-        return None, result.fun  # no alignment within tolerance
-    closest_time = start_dt + timedelta(seconds=result.x)
-    return closest_time, result.fun
+
+    if fun > tol:
+        return None, fun  # no alignment within tolerance
+    closest_time = datetime.fromtimestamp(start_ts + x, tz=timezone.utc)
+    return closest_time, fun
+
+def find_sunrise_sunset(start_ts, grid_alt):
+    """
+    Locate the first sunrise and first sunset of the day as horizon crossings on the per-minute
+    altitude grid starting at the POSIX timestamp start_ts, linearly interpolated between the
+    bracketing minutes.
+    Returns (sunrise, sunset) as UTC datetimes; either is None if that event does not occur.
+    """
+    h = grid_alt - SUN_HORIZON_DEG
+    above = h > 0
+    sunrise = sunset = None
+    for i in np.flatnonzero(above[1:] != above[:-1]):
+        frac = h[i] / (h[i] - h[i + 1])
+        when = datetime.fromtimestamp(start_ts + (i + frac) * 60, tz=timezone.utc)
+        if above[i + 1] and sunrise is None:
+            sunrise = when
+        elif not above[i + 1] and sunset is None:
+            sunset = when
+    return sunrise, sunset
+
+def batch_alignments(lats, lons, date, tz_names, targets=None, tol=5.0):
+    """
+    Per-minute shadow-alignment times for many locations on the same local date.
+    lats/lons are in degrees, tz_names are IANA timezone names and targets are azimuths in degrees
+    (default: each location's Qibla bearing; a single value applies to all). The solar position is
+    computed once on a shared minute grid spanning every location's local day and each location
+    takes its own 1441-sample window.
+    Returns a list with one (facing, behind) pair per location, split by which side of the sky the
+    sun is on as in the interactive path; each is (UTC datetime or None, error in degrees), without
+    the Skyfield refinement.
+    Raises ValueError if lats, lons, tz_names and targets differ in length.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    tz_names = list(tz_names)
+    if targets is None:
+        targets = [calculate_qibla_bearing(la, lo) for la, lo in zip(lats, lons)]
+    targets = np.asarray(targets, dtype=float)
+    if targets.ndim == 0:
+        targets = np.full(len(lats), float(targets))  # one bearing shared by every location
+    if not len(lats) == len(lons) == len(tz_names) == len(targets):
+        raise ValueError("lats, lons, tz_names and targets must have the same length")
+    if len(lats) == 0:
+        return []
+
+    start_ts = np.array([
+        datetime.combine(date, datetime.min.time(), tzinfo=ZoneInfo(tz)).timestamp() for tz in tz_names
+    ])
+    grid_ts = start_ts.min()
+    offsets = np.rint((start_ts - grid_ts) / 60).astype(int)  # first grid minute of each local day
+
+    day = np.arange(0, 24 * 60 + 1)
+    minutes = np.arange(0, offsets.max() + len(day))
+    ra, dec, gmst = _sun_equatorial(grid_ts / 86400.0 + 2440587.5 + minutes / 1440.0)
+
+    idx = offsets[:, None] + day  # (locations, minutes) window into the shared grid
+    alt_deg, az_deg = _equatorial_to_altaz(ra[idx], dec[idx], gmst[idx],
+                                           np.radians(lats)[:, None], np.radians(lons)[:, None])
+    err = _error_from_az(alt_deg, az_deg, targets[:, None])
+    # Facing Qibla when the sun is on the Qibla side, Kaabah behind otherwise
+    near_qibla = np.abs((az_deg - targets[:, None] + 180) % 360 - 180) < 90
+
+    def best(side_err, k):
+        i = int(np.argmin(side_err[k]))
+        if side_err[k, i] > tol:
+            return None, side_err[k, i]  # no alignment within tolerance
+        return datetime.fromtimestamp(grid_ts + (offsets[k] + i) * 60, tz=timezone.utc), side_err[k, i]
+
+    err_facing = np.where(near_qibla, err, 999.0)
+    err_behind = np.where(near_qibla, 999.0, err)
+    return [(best(err_facing, k), best(err_behind, k)) for k in range(len(lats))]
 
 def altaz_to_xy(az_deg, alt_deg):
     """
@@ -91,6 +229,15 @@ def altaz_to_xy(az_deg, alt_deg):
     y = r * math.cos(az_rad)
     return x, y
 
+def grid_altaz(when, start_ts, grid_alt, grid_az):
+    """
+    Look up the sun's (altitude, azimuth) in degrees on the per-minute grid starting at start_ts,
+    at the sample nearest to the datetime when.
+    """
+    i = int(round((when.timestamp() - start_ts) / 60))
+    i = min(max(i, 0), len(grid_az) - 1)
+    return grid_alt[i], grid_az[i]
+
 def bearing_to_xy(bearing_deg):
     """
     Convert a bearing from north (in degrees) to an (x, y) coordinate on the horizon circle.
@@ -110,9 +257,13 @@ def get_coordinates():
         except ValueError:
             print("❌ Invalid input. Please enter numeric values.\n")
 
+_TF = None
+
 def get_timezone(lat, lon):
-    tf = TimezoneFinder()
-    detected = tf.timezone_at(lat=lat, lng=lon) or "Asia/Kuala_Lumpur"
+    global _TF
+    if _TF is None:
+        _TF = TimezoneFinder(in_memory=True)  # built once, reused by later lookups
+    detected = _TF.timezone_at(lat=lat, lng=lon) or "Asia/Kuala_Lumpur"
     print(f"🕒 Detected timezone: {detected}")
     if input("Use this timezone? (Y/n): ").strip().lower() in ("", "y", "yes"):
         return detected
@@ -124,166 +275,162 @@ def get_timezone(lat, lon):
         print("\n".join(pytz.all_timezones), "\n")
 
 # === Main ===
-lat, lon = get_coordinates()
-tz_str = get_timezone(lat, lon)
-
-print(f"\n✅ Final Settings:\n Latitude : {lat}\n Longitude: {lon}\n Timezone : {tz_str}")
-
-date_input = input("Enter date (YYYY-MM-DD) (default today): ")
-try:
-    date = datetime.strptime(date_input, "%Y-%m-%d").date() if date_input else datetime.now().date()
-except:
-    date = datetime.now().date()
-
-timezone = pytz.timezone(tz_str)
-
-# === Calculate Qibla Bearing ===
-qibla_bearing = calculate_qibla_bearing(lat, lon)
-
-# === Find Closest Alignment Times (two cases) ===
-# Case 1: When facing Qibla directly
-closest_time_facing, az_error_facing = find_closest_azimuth_time(lat, lon, tz_str, date, qibla_bearing)
-# Case 2: When Kaabah is behind (reverse alignment)
-closest_time_behind, az_error_behind = find_closest_azimuth_time(lat, lon, tz_str, date, (qibla_bearing + 180) % 360)
-
-# Check if either candidate is valid (i.e. error within tolerance)
-if closest_time_facing is None and closest_time_behind is None:
-    shadow_found = False
-else:
-    shadow_found = True
-
-# === Compute Sunrise and Sunset Times using Skyfield Almanac ===
-observer = Topos(latitude_degrees=lat, longitude_degrees=lon)
-t0 = ts.utc(date.year, date.month, date.day, 0, 0, 0)
-t1 = ts.utc(date.year, date.month, date.day, 23, 59, 59)
-f = almanac.sunrise_sunset(eph, observer)
-t_events, events = almanac.find_discrete(t0, t1, f)
-sunrise_time = None
-sunset_time = None
-for t_event, ev in zip(t_events, events):
-    # t_event.utc_datetime() already returns a tz-aware datetime
-    dt_event = t_event.utc_datetime().astimezone(timezone)
-    if ev == 1 and sunrise_time is None:
-        sunrise_time = dt_event
-    elif ev == 0 and sunset_time is None:
-        sunset_time = dt_event
-
-# === Calculate Sun Path for the Day ===
-start_local = datetime.combine(date, datetime.min.time())
-start_utc = timezone.localize(start_local).astimezone(pytz.utc)
-end_utc = start_utc + timedelta(days=1)
-
-sun_x = []
-sun_y = []
-step = timedelta(minutes=1)
-t_iter = start_utc
-while t_iter <= end_utc:
-    ts_t = ts.from_datetime(t_iter)
-    obs = earth + Topos(latitude_degrees=lat, longitude_degrees=lon)
-    sun_app = obs.at(ts_t).observe(sun).apparent()
-    alt, az, _ = sun_app.altaz()
-    if alt.degrees > 0:
-        x, y = altaz_to_xy(az.degrees, alt.degrees)
-        sun_x.append(x)
-        sun_y.append(y)
-    t_iter += step
-
-# === Plotting Section ===
-plt.figure(figsize=(8, 8))
-
-# Draw the horizon (dashed circle; r = 90)
-theta = np.linspace(0, 2 * math.pi, 360)
-circle_x = 90 * np.sin(theta)
-circle_y = 90 * np.cos(theta)
-plt.plot(circle_x, circle_y, 'k--', label="Horizon (0° Alt)")
-
-# Plot the sun's path
-plt.plot(sun_x, sun_y, 'o-', color='orange', markersize=3, label="Sun Path")
-
-# --- Mark sunrise and sunset (if available) in the plot ---
-if sunrise_time is not None:
-    t_sr = ts.from_datetime(sunrise_time)
-    # Use (earth + observer) instead of observer
-    obs_sr = (earth + observer).at(t_sr).observe(sun).apparent()
-    alt_sr, az_sr, _ = obs_sr.altaz()
-    x_sr, y_sr = altaz_to_xy(az_sr.degrees, alt_sr.degrees)
-    plt.plot(x_sr, y_sr, 'y*', markersize=12, label="Sunrise")
-    plt.text(x_sr + 1, y_sr + 1, sunrise_time.strftime('%H:%M:%S'), color='goldenrod', fontsize=9)
-if sunset_time is not None:
-    t_ss = ts.from_datetime(sunset_time)
-    # Use (earth + observer) instead of observer
-    obs_ss = (earth + observer).at(t_ss).observe(sun).apparent()
-    alt_ss, az_ss, _ = obs_ss.altaz()
-    x_ss, y_ss = altaz_to_xy(az_ss.degrees, alt_ss.degrees)
-    plt.plot(x_ss, y_ss, 'c*', markersize=12, label="Sunset")
-    plt.text(x_ss + 1, y_ss + 1, sunset_time.strftime('%H:%M:%S'), color='darkcyan', fontsize=9)
-
-# Mark the shadow alignment events if found
-if closest_time_facing:
-    t_cf = ts.from_datetime(closest_time_facing)
-    obs_cf = (earth + Topos(latitude_degrees=lat, longitude_degrees=lon)).at(t_cf).observe(sun).apparent()
-    alt_cf, az_cf, _ = obs_cf.altaz()
-    x_cf, y_cf = altaz_to_xy(az_cf.degrees, alt_cf.degrees)
-    plt.plot(x_cf, y_cf, 'ro', markersize=8, label="Alignment (Facing Qibla)")
-    time_str = closest_time_facing.astimezone(timezone).strftime('%H:%M:%S')
-    plt.text(x_cf + 1, y_cf + 1, f"{time_str}", color='red', fontsize=9)
-
-if closest_time_behind:
-    t_cb = ts.from_datetime(closest_time_behind)
-    obs_cb = (earth + Topos(latitude_degrees=lat, longitude_degrees=lon)).at(t_cb).observe(sun).apparent()
-    alt_cb, az_cb, _ = obs_cb.altaz()
-    x_cb, y_cb = altaz_to_xy(az_cb.degrees, alt_cb.degrees)
-    plt.plot(x_cb, y_cb, 'mo', markersize=8, label="Alignment (Kaabah Behind)")
-    time_str = closest_time_behind.astimezone(timezone).strftime('%H:%M:%S')
-    plt.text(x_cb + 1, y_cb + 1, f"{time_str}", color='magenta', fontsize=9)
-
-# Mark the home location
-plt.plot(0, 0, 'bs', markersize=10, label="Home Location")
-
-# Draw the Qibla bearing arrow
-line_x, line_y = bearing_to_xy(qibla_bearing)
-plt.arrow(0, 0, line_x, line_y, width=1.0, length_includes_head=True, color='green', label="Qibla Direction")
-plt.text(line_x/2, line_y, f" Kaabah\n({qibla_bearing:.1f}°)", color='green', fontsize=10)
-
-# If no valid shadow alignment was found, annotate on the plot
-if not shadow_found:
-    plt.text(0, -80, "No shadow alignment on this date", color='red',
-             fontsize=12, ha='center')
-
-plt.xlabel("X (East)")
-plt.ylabel("Y (North)")
-plt.title(f"Sun Path on {date.strftime('%Y-%m-%d')} at Home ({lat}, {lon})")
-plt.legend(loc="upper right")
-plt.grid(True)
-plt.axis('equal')
-
-# Use non-blocking plt.show
-print("\n(Note: The plot window is blocking, close the plot window to continue running.)")
-plt.show()
-
-# === Console Output ===
-print("\n--- Sun Times ---")
-if sunrise_time:
-    print("Sunrise (Local):", sunrise_time.strftime('%Y-%m-%d %H:%M:%S'))
-else:
-    print("Sunrise time not available for this date.")
-if sunset_time:
-    print("Sunset (Local):", sunset_time.strftime('%Y-%m-%d %H:%M:%S'))
-else:
-    print("Sunset time not available for this date.")
-
-print("\n--- Shadow Alignment Times ---")
-if shadow_found:
+if __name__ == "__main__":
+    lat, lon = get_coordinates()
+    OBSERVER = earth + Topos(latitude_degrees=lat, longitude_degrees=lon)
+    SUN_FROM_OBSERVER = sun - OBSERVER
+    tz_str = get_timezone(lat, lon)
+
+    print(f"\n✅ Final Settings:\n Latitude : {lat}\n Longitude: {lon}\n Timezone : {tz_str}")
+
+    date_input = input("Enter date (YYYY-MM-DD) (default today): ")
+    try:
+        date = datetime.strptime(date_input, "%Y-%m-%d").date() if date_input else datetime.now().date()
+    except:
+        date = datetime.now().date()
+
+    TZ = ZoneInfo(tz_str)
+
+    # === Calculate Qibla Bearing ===
+    qibla_bearing = calculate_qibla_bearing(lat, lon)
+    qibla_x, qibla_y = bearing_to_xy(qibla_bearing)
+
+    # === Calculate Sun Path for the Day ===
+    start_utc = datetime.combine(date, datetime.min.time(), tzinfo=TZ).astimezone(timezone.utc)
+    start_ts = start_utc.timestamp()
+    jd0 = ts.from_datetime(start_utc).ut1  # UT1 start for the Skyfield refinement step
+    # Evaluate the whole day (one sample per minute) with the closed-form solar position
+    minutes = np.arange(0, 24 * 60 + 1)
+    jd_start = start_ts / 86400.0 + 2440587.5
+    alt_deg, az_deg = sun_altaz_vec(jd_start + minutes / 1440.0, math.radians(lat), math.radians(lon))
+
+    mask = alt_deg > 0
+    r = 90 - alt_deg[mask]
+    az_rad = np.radians(az_deg[mask])
+    sun_x = r * np.sin(az_rad)
+    sun_y = r * np.cos(az_rad)
+
+    # === Find Closest Alignment Times (two cases) ===
+    # The error is symmetric in target and target+180°, so one search covers both cases; the sun's
+    # azimuth at the result says which case it is (facing Qibla when the sun is on the Qibla side).
+    closest_time_facing = closest_time_behind = None
+    az_error_facing = az_error_behind = None
+    closest_time, az_error = find_closest_azimuth_time(SUN_FROM_OBSERVER, start_ts, jd0, alt_deg, az_deg, qibla_bearing)
+    if closest_time is not None:
+        _, az_found = grid_altaz(closest_time, start_ts, alt_deg, az_deg)
+        found_facing = abs((az_found - qibla_bearing + 180) % 360 - 180) < 90
+        # The other case can only occur where the sun is on the other side; hide the rest of the day
+        near_qibla = np.abs((az_deg - qibla_bearing + 180) % 360 - 180) < 90
+        other_alt = np.where(near_qibla == found_facing, -90.0, alt_deg)
+        other_time, other_error = find_closest_azimuth_time(SUN_FROM_OBSERVER, start_ts, jd0, other_alt, az_deg, qibla_bearing)
+        if found_facing:
+            closest_time_facing, az_error_facing = closest_time, az_error
+            closest_time_behind, az_error_behind = other_time, other_error
+        else:
+            closest_time_behind, az_error_behind = closest_time, az_error
+            closest_time_facing, az_error_facing = other_time, other_error
+
+    # Check if either candidate is valid (i.e. error within tolerance)
+    if closest_time_facing is None and closest_time_behind is None:
+        shadow_found = False
+    else:
+        shadow_found = True
+
+    # === Compute Sunrise and Sunset Times from the Sun Path Grid ===
+    sunrise_time, sunset_time = find_sunrise_sunset(start_ts, alt_deg)
+    if sunrise_time is not None:
+        sunrise_time = sunrise_time.astimezone(TZ)
+    if sunset_time is not None:
+        sunset_time = sunset_time.astimezone(TZ)
+
+    # === Plotting Section ===
+    plt.figure(figsize=(8, 8))
+
+    # Draw the horizon (dashed circle; r = 90)
+    plt.plot(HORIZON_X, HORIZON_Y, 'k--', label="Horizon (0° Alt)")
+
+    # Plot the sun's path
+    plt.plot(sun_x, sun_y, 'o-', color='orange', markersize=3, label="Sun Path")
+
+    # --- Mark sunrise and sunset (if available) in the plot ---
+    if sunrise_time is not None:
+        alt_sr, az_sr = grid_altaz(sunrise_time, start_ts, alt_deg, az_deg)
+        x_sr, y_sr = altaz_to_xy(az_sr, alt_sr)
+        plt.plot(x_sr, y_sr, 'y*', markersize=12, label="Sunrise")
+        plt.text(x_sr + 1, y_sr + 1, sunrise_time.strftime('%H:%M:%S'), color='goldenrod', fontsize=9)
+    if sunset_time is not None:
+        alt_ss, az_ss = grid_altaz(sunset_time, start_ts, alt_deg, az_deg)
+        x_ss, y_ss = altaz_to_xy(az_ss, alt_ss)
+        plt.plot(x_ss, y_ss, 'c*', markersize=12, label="Sunset")
+        plt.text(x_ss + 1, y_ss + 1, sunset_time.strftime('%H:%M:%S'), color='darkcyan', fontsize=9)
+
+    # Mark the shadow alignment events if found
     if closest_time_facing:
-        print("Alignment (Facing Qibla):")
-        print(" UTC:", closest_time_facing)
-        print(" Local:", closest_time_facing.astimezone(timezone))
-        print(f" Azimuth error: {az_error_facing:.6f}°")
+        alt_cf, az_cf = grid_altaz(closest_time_facing, start_ts, alt_deg, az_deg)
+        x_cf, y_cf = altaz_to_xy(az_cf, alt_cf)
+        plt.plot(x_cf, y_cf, 'ro', markersize=8, label="Alignment (Facing Qibla)")
+        time_str = closest_time_facing.astimezone(TZ).strftime('%H:%M:%S')
+        plt.text(x_cf + 1, y_cf + 1, f"{time_str}", color='red', fontsize=9)
+
     if closest_time_behind:
-        print("\nAlignment (Kaabah Behind):")
-        print(" UTC:", closest_time_behind)
-        print(" Local:", closest_time_behind.astimezone(timezone))
-        print(f" Azimuth error: {az_error_behind:.6f}°")
-else:
-    print("No valid shadow alignment found on this date.")
+        alt_cb, az_cb = grid_altaz(closest_time_behind, start_ts, alt_deg, az_deg)
+        x_cb, y_cb = altaz_to_xy(az_cb, alt_cb)
+        plt.plot(x_cb, y_cb, 'mo', markersize=8, label="Alignment (Kaabah Behind)")
+        time_str = closest_time_behind.astimezone(TZ).strftime('%H:%M:%S')
+        plt.text(x_cb + 1, y_cb + 1, f"{time_str}", color='magenta', fontsize=9)
+
+    # Mark the home location
+    plt.plot(0, 0, 'bs', markersize=10, label="Home Location")
+
+    # Draw the Qibla bearing arrow
+    plt.arrow(0, 0, qibla_x, qibla_y, width=1.0, length_includes_head=True, color='green', label="Qibla Direction")
+    plt.text(qibla_x/2, qibla_y, f" Kaabah\n({qibla_bearing:.1f}°)", color='green', fontsize=10)
+
+    # If no valid shadow alignment was found, annotate on the plot
+    if not shadow_found:
+        plt.text(0, -80, "No shadow alignment on this date", color='red',
+                 fontsize=12, ha='center')
+
+    plt.xlabel("X (East)")
+    plt.ylabel("Y (North)")
+    plt.title(f"Sun Path on {date.strftime('%Y-%m-%d')} at Home ({lat}, {lon})")
+    plt.legend(loc="upper right")
+    plt.grid(True)
+    plt.axis('equal')
+
+    if HEADLESS:
+        plot_file = f"kiblat_{date}.png"
+        plt.savefig(plot_file, dpi=100)
+        print(f"\n🖼️ Plot saved to {plot_file}")
+    else:
+        print("\n(Note: The plot window is blocking, close the plot window to continue running.)")
+        plt.show()
+
+    # === Console Output ===
+    print("\n--- Sun Times ---")
+    if sunrise_time:
+        print("Sunrise (Local):", sunrise_time.strftime('%Y-%m-%d %H:%M:%S'))
+    else:
+        print("Sunrise time not available for this date.")
+    if sunset_time:
+        print("Sunset (Local):", sunset_time.strftime('%Y-%m-%d %H:%M:%S'))
+    else:
+        print("Sunset time not available for this date.")
+
+    print("\n--- Shadow Alignment Times ---")
+    if shadow_found:
+        if closest_time_facing:
+            print("Alignment (Facing Qibla):")
+            print(" UTC:", closest_time_facing)
+            print(" Local:", closest_time_facing.astimezone(TZ))
+            print(f" Azimuth error: {az_error_facing:.6f}°")
+        if closest_time_behind:
+            if closest_time_facing:
+                print()  # blank line between the two alignment blocks
+            print("Alignment (Kaabah Behind):")
+            print(" UTC:", closest_time_behind)
+            print(" Local:", closest_time_behind.astimezone(TZ))
+            print(f" Azimuth error: {az_error_behind:.6f}°")
+    else:
+        print("No valid shadow alignment found on this date.")
 